@@ -3,13 +3,12 @@ from collections import defaultdict
 from collections.abc import Iterable, Mapping
 from dataclasses import dataclass
 from datetime import date, timedelta
-from heapq import merge
-from itertools import groupby
+from itertools import chain, groupby
+from operator import attrgetter
 
 from .date_time import DateRange
-from .probability import DEFAULT_CERTAINTY_TOLERANCE, FloatDistribution, clamp_certain, effectively_certain
+from .probability import DEFAULT_CERTAINTY_TOLERANCE, FloatDistribution, certainty_threshold
 from .schedule import DateDistribution, EventSchedule
-from .utility import merge_by_date
 
 
 __all__ = [
@@ -62,7 +61,7 @@ class ScheduledCashFlow:
             raise ValueError('amount must be nonnegative')
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class CashBalanceDelta:
     """A change in an uncertain cash balance."""
 
@@ -80,7 +79,7 @@ class CashBalanceDelta:
         return other.from_inexact(min=other.min + self.min, max=other.max + self.max, mean=other.mean + self.mean)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CashBalanceUpdate:
     """Describes a change in the relative cash balance of a `CashEndpoint` as a result of a possible cash flow event."""
 
@@ -98,63 +97,91 @@ def generate_balance_updates(cash_flow: ScheduledCashFlow, date_range: DateRange
 
         This operation assumes `date_range` span the entire timeframe you're interested in. This is due to the way min
         and max balances are updated when looking at a subset of all possible event occurrences. Therefore it is not
-        safe to splice or concatenate resulting sequences of `CashBalanceUpdate`."""
+        safe to splice or concatenate resulting sequences of `CashBalanceUpdate`.
+
+        The updates are returned as a complete sorted list rather than generated lazily, so memory use grows with the
+        number of events in `date_range`. In exchange, sorting is faster than merging one iterator per event."""
 
     source = cash_flow.source
     sink = cash_flow.sink
     amount = cash_flow.amount
+    # Probabilities at or above this are considered certain.
+    certain_threshold = certainty_threshold(certainty_tolerance)
+    # Deltas are immutable, and these ones are the same for every event, so create them once up front. Likewise for the
+    # range bounds, which are otherwise recomputed by properties.
+    source_lower_bound_delta = CashBalanceDelta(min=-amount.max)
+    sink_upper_bound_delta = CashBalanceDelta(max=amount.max)
+    source_certain_mean_delta = CashBalanceDelta(mean=-amount.mean)
+    sink_certain_mean_delta = CashBalanceDelta(mean=amount.mean)
+    source_certain_upper_bound_delta = CashBalanceDelta(max=-amount.min)
+    sink_certain_lower_bound_delta = CashBalanceDelta(min=amount.min)
+    inclusive_lower_bound = date_range.inclusive_lower_bound
+    inclusive_upper_bound = date_range.inclusive_upper_bound
+    exclusive_upper_bound = date_range.exclusive_upper_bound
+    one_day = timedelta(days=1)
 
     def generate_event_updates(event: DateDistribution, /) -> Iterable[CashBalanceUpdate]:
         # Date lower bound - first time the event could possibly occur (within the timeframe we're interested in).
         # Lower bound is at the start of the day of occurrence.
-        first_occurrence = event.lower_bound_inclusive(date_range.inclusive_lower_bound)
+        first_occurrence = event.lower_bound_inclusive(inclusive_lower_bound)
         assert first_occurrence is not None
-        yield CashBalanceUpdate(first_occurrence.value, source, CashBalanceDelta(min=-amount.max), cash_flow)
-        yield CashBalanceUpdate(first_occurrence.value, sink, CashBalanceDelta(max=amount.max), cash_flow)
+        yield CashBalanceUpdate(first_occurrence.value, source, source_lower_bound_delta, cash_flow)
+        yield CashBalanceUpdate(first_occurrence.value, sink, sink_upper_bound_delta, cash_flow)
 
-        probability_in_range = event.probability_in(date_range.inclusive_lower_bound, date_range.exclusive_upper_bound)
+        probability_in_range = event.probability_in(inclusive_lower_bound, exclusive_upper_bound)
         assert probability_in_range > 0
 
-        for occurrence in event.iterate(date_range.inclusive_lower_bound, date_range.exclusive_upper_bound):
+        for occurrence in event.iterate(inclusive_lower_bound, exclusive_upper_bound):
             # Mean increases linearly up to the end of the day of occurrence (i.e. start of the following day).
             # The following day could be outside the requested date range, but we'll allow it because it's equivalent to
             # the end of the last day in the range.
-            following_date = occurrence.value + timedelta(days=1)
+            following_date = occurrence.value + one_day
 
             # If we count the occurrence as certain, then it doesn't make much sense to adjust the mean by any
             # probability other than 1.
-            update_amount = amount.mean * clamp_certain(occurrence.probability, tolerance=certainty_tolerance)
+            probability = occurrence.probability
+            if probability >= certain_threshold:
+                source_delta = source_certain_mean_delta
+                sink_delta = sink_certain_mean_delta
+            else:
+                update_amount = amount.mean * probability
+                source_delta = CashBalanceDelta(mean=-update_amount)
+                sink_delta = CashBalanceDelta(mean=update_amount)
 
-            yield CashBalanceUpdate(
-                following_date, source, CashBalanceDelta(mean=-update_amount), cash_flow)
-            yield CashBalanceUpdate(
-                following_date, sink, CashBalanceDelta(mean=update_amount), cash_flow)
+            yield CashBalanceUpdate(following_date, source, source_delta, cash_flow)
+            yield CashBalanceUpdate(following_date, sink, sink_delta, cash_flow)
 
-        last_occurrence = event.upper_bound_inclusive(date_range.inclusive_upper_bound)
+        last_occurrence = event.upper_bound_inclusive(inclusive_upper_bound)
         assert last_occurrence is not None
-        has_upper_bound = effectively_certain(event.cumulative_probability(date_range.inclusive_upper_bound),
-            tolerance=certainty_tolerance)
+        has_upper_bound = event.cumulative_probability(inclusive_upper_bound) >= certain_threshold
         if has_upper_bound:
             # Date upper bound - event must have occurred by now.
             # Upper bound is at the end of the day of occurrence (i.e. start of the following day).
             # The following day could be outside the requested date range, but we'll allow it because it's equivalent to
             # the end of the last day in the range.
-            following_date = last_occurrence.value + timedelta(days=1)
+            following_date = last_occurrence.value + one_day
 
             # Need to scale the update amount by the probability that the event occurs within the specified range to
             # ensure consistent distributions when accumulating account balances.
             # Consider the case where the event is possible to occur before the date range, the source's max balance
             # must not fall below its mean balance (and the sink's min must not rise above its mean).
-            update_amount = amount.min * clamp_certain(probability_in_range, tolerance=certainty_tolerance)
-            yield CashBalanceUpdate(following_date, source, CashBalanceDelta(max=-update_amount), cash_flow)
-            yield CashBalanceUpdate(following_date, sink, CashBalanceDelta(min=update_amount), cash_flow)
+            if probability_in_range >= certain_threshold:
+                source_delta = source_certain_upper_bound_delta
+                sink_delta = sink_certain_lower_bound_delta
+            else:
+                update_amount = amount.min * probability_in_range
+                source_delta = CashBalanceDelta(max=-update_amount)
+                sink_delta = CashBalanceDelta(min=update_amount)
+            yield CashBalanceUpdate(following_date, source, source_delta, cash_flow)
+            yield CashBalanceUpdate(following_date, sink, sink_delta, cash_flow)
 
-    events = cash_flow.schedule.iterate(date_range)
-    event_update_iterators = map(generate_event_updates, events)
-    return merge_by_date(event_update_iterators)
+    events = cash_flow.schedule.iterate_cached(date_range)
+    # As in generate_cash_flow_logs(), one stable sort is cheaper than a heap merge across one iterator per event.
+    updates = chain.from_iterable(map(generate_event_updates, events))
+    return sorted(updates, key=attrgetter('date'))
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CashBalanceRecord:
     # The balance is taken at the start of the day given by `date` (alternatively, at the end of the previous day).
     date: date
@@ -170,24 +197,34 @@ def accumulate_endpoint_balances(updates: Iterable[CashBalanceUpdate], /,
 
         `updates` must be presorted in chronological order."""
 
-    endpoint_balances: defaultdict[CashEndpoint, FloatDistribution] = defaultdict(lambda: FloatDistribution.singular(0))
-    endpoint_balances.update(initial_balances)
+    # Running balances are kept as plain [min, mean, max] lists so that applying an update is just float additions. A
+    # distribution is only constructed (and validated) once per changed endpoint per day.
+    endpoint_balances: defaultdict[CashEndpoint, list[float]] = defaultdict(lambda: [0, 0, 0])
+    endpoint_balances.update(
+        (endpoint, [balance.min, balance.mean, balance.max]) for endpoint, balance in initial_balances.items())
 
     result: defaultdict[CashEndpoint, list[CashBalanceRecord]] = defaultdict(list)
     prev_day = date.min
-    for day, day_updates in groupby(updates, lambda update: update.date):
+    for day, day_updates in groupby(updates, attrgetter('date')):
         if day < prev_day:
             raise ValueError('updates must be in chronological order')
 
-        endpoints_changed: set[CashEndpoint] = set()
+        # Keyed by endpoint so the balances can be finalised without looking them up again.
+        endpoints_changed: dict[CashEndpoint, list[float]] = {}
         for update in day_updates:
-            endpoint_balances[update.endpoint] += update.delta
-            endpoints_changed.add(update.endpoint)
+            endpoint = update.endpoint
+            balance = endpoints_changed[endpoint] = endpoint_balances[endpoint]
+            delta = update.delta
+            balance[0] += delta.min
+            balance[1] += delta.mean
+            balance[2] += delta.max
         # Accumulated balances are taken at the end of the day, but stored as start of day (because it's easier to use).
         # Note that update.date is the start of the day the update occurs on.
-        for endpoint in endpoints_changed:
-            result[endpoint].append(
-                CashBalanceRecord(day, amount=endpoint_balances[endpoint]))
+        for endpoint, balance in endpoints_changed.items():
+            amount = FloatDistribution.from_inexact(min=balance[0], mean=balance[1], max=balance[2])
+            # Carry the corrected values forward so that floating point error can't accumulate across days.
+            balance[:] = amount.min, amount.mean, amount.max
+            result[endpoint].append(CashBalanceRecord(day, amount=amount))
 
         prev_day = day
 
@@ -200,9 +237,12 @@ def simulate_cash_balances(cash_flows: Iterable[ScheduledCashFlow], date_range:
         -> dict[CashEndpoint, list[CashBalanceRecord]]:
     """Simulates cash balances of endpoints resulting from cash flows over the specified timeframe."""
 
-    balance_updates = merge_by_date(
-        generate_balance_updates(cash_flow, date_range, certainty_tolerance=certainty_tolerance)
-        for cash_flow in cash_flows)
+    # Each cash flow's updates are already sorted, which the sort detects and merges as presorted runs.
+    balance_updates = sorted(
+        chain.from_iterable(
+            generate_balance_updates(cash_flow, date_range, certainty_tolerance=certainty_tolerance)
+            for cash_flow in cash_flows),
+        key=attrgetter('date'))
     balance_records = accumulate_endpoint_balances(balance_updates, initial_balances)
 
     if not date_range.is_empty:
@@ -226,15 +266,18 @@ def summarise_total_cash_flow(cash_flow: ScheduledCashFlow, date_range: DateRang
         certainty_tolerance: float = DEFAULT_CERTAINTY_TOLERANCE) -> FloatDistribution:
     """Calculates the distribution of the total amount of cash transferred by `cash_flow` within `date_range`."""
 
+    certain_threshold = certainty_threshold(certainty_tolerance)
+
     if date_range.is_empty:
         return FloatDistribution(min=0, max=0, mean=0)
 
-    events = tuple(cash_flow.schedule.iterate(date_range))
+    events = cash_flow.schedule.iterate_cached(date_range)
+    # Each event's probability is needed for both the min and mean, so compute them once.
+    probabilities = [event.probability_in(date_range.inclusive_lower_bound, date_range.exclusive_upper_bound)
+                     for event in events]
 
     # Minimum cash total happens when only the events which are certain to occur in the timeframe do occur.
-    certain_events = sum(1 for event in events
-        if effectively_certain(event.probability_in(date_range.inclusive_lower_bound, date_range.exclusive_upper_bound),
-            tolerance=certainty_tolerance))
+    certain_events = sum(1 for probability in probabilities if probability >= certain_threshold)
     min_amount = cash_flow.amount.min * certain_events
 
     # Maximum cash total happens when each possible event does occur. Note that all events from schedule.iterate() are
@@ -242,14 +285,12 @@ def summarise_total_cash_flow(cash_flow: ScheduledCashFlow, date_range: DateRang
     max_amount = cash_flow.amount.max * len(events)
 
     # Mean cash total is simply the mean amount scaled by the total probability of occurrence within the timeframe.
-    mean_amount = (cash_flow.amount.mean *
-        sum(event.probability_in(date_range.inclusive_lower_bound, date_range.exclusive_upper_bound)
-            for event in events))
+    mean_amount = cash_flow.amount.mean * sum(probabilities)
 
     return FloatDistribution(min=min_amount, max=max_amount, mean=mean_amount)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CashFlowLog:
     """Creates a human-readable description for a cash flow event."""
 
@@ -261,35 +302,33 @@ class CashFlowLog:
     sink: CashEndpoint
 
     def __lt__(self, other: 'CashFlowLog', /) -> bool:
-        return (self.date, self.bound_type) < (other.date, other.bound_type)
+        # Compare fields directly rather than building tuples. Sorting logs uses a key, so this is only called when
+        # CashFlowAnalysis.log_cash_flows() merges logs with heapq.merge.
+        if self.date != other.date:
+            return self.date < other.date
+        return self.bound_type < other.bound_type
 
     def __str__(self) -> str:
         return f'{self.date} {self._bound_marker} | ${self.amount.to_str(2)} from "{self.source.label}" to "{self.sink.label}"'
 
     @property
     def _bound_marker(self) -> str:
-        if self.bound_type < 0:
-            if self.exact_bound:
-                return 'vv'
-            else:
-                return '~v'
-        elif self.bound_type > 0:
-            if self.exact_bound:
-                return '^^'
-            else:
-                return '~^'
-        else:
-            if self.exact_bound:
-                return '=='
-            else:
-                return '~~'
+        return _BOUND_MARKERS[self.exact_bound][(self.bound_type > 0) - (self.bound_type < 0) + 1]
+
+
+_BOUND_MARKERS = (('~v', '~~', '~^'), ('vv', '==', '^^'))
+"""Markers for `CashFlowLog`, indexed by `[exact_bound][sign(bound_type) + 1]`."""
 
 
 def generate_cash_flow_logs(cash_flow: ScheduledCashFlow, date_range: DateRange, /,
         certainty_tolerance: float = DEFAULT_CERTAINTY_TOLERANCE) -> Iterable[CashFlowLog]:
     """Generates a human-readable description for each cash flow event within the given timeframe.
 
-        Logs are sorted by date."""
+        Logs are sorted by date. They are returned as a complete list rather than generated lazily, so memory use grows
+        with the number of events in the timeframe. In exchange, sorting is faster than merging one iterator per
+        event."""
+
+    certain_threshold = certainty_threshold(certainty_tolerance)
 
     def generate_event_logs(event: DateDistribution, /) -> Iterable[CashFlowLog]:
         first_occurrence = event.lower_bound_inclusive(date_range.inclusive_lower_bound)
@@ -299,7 +338,7 @@ def generate_cash_flow_logs(cash_flow: ScheduledCashFlow, date_range: DateRange,
 
         exact_lower_bound = first_occurrence == event.outcomes[0]
         exact_upper_bound = (last_occurrence == event.outcomes[-1]
-            and effectively_certain(event.cumulative_probability(last_occurrence.value), tolerance=certainty_tolerance))
+            and event.cumulative_probability(last_occurrence.value) >= certain_threshold)
 
         if first_occurrence.value == last_occurrence.value:
             exact = exact_lower_bound and exact_upper_bound
@@ -310,6 +349,8 @@ def generate_cash_flow_logs(cash_flow: ScheduledCashFlow, date_range: DateRange,
             yield CashFlowLog(
                 last_occurrence.value, 1, exact_upper_bound, cash_flow.amount, cash_flow.source, cash_flow.sink)
 
-    events = cash_flow.schedule.iterate(date_range)
-    event_log_iterators = map(generate_event_logs, events)
-    return merge(*event_log_iterators)
+    events = cash_flow.schedule.iterate_cached(date_range)
+    # Events are roughly in chronological order already, so one sort of all the logs (which is adaptive to presorted
+    # runs) is cheaper than a heap merge across one iterator per event. The sort is stable, so ties keep event order.
+    logs = chain.from_iterable(map(generate_event_logs, events))
+    return sorted(logs, key=attrgetter('date', 'bound_type'))
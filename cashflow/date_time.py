@@ -1,11 +1,9 @@
-from calendar import MONDAY
+from calendar import MONDAY, isleap
 from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from typing import Literal, cast
 
-from dateutil.relativedelta import relativedelta
-
 
 __all__ = [
     'DateRange',
@@ -26,7 +24,11 @@ DayOfMonthNumeral = Literal[
 MonthNumeral = Literal[1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
 
 
-@dataclass(frozen=True, order=True)
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+"""Number of days in each month of a non-leap year, indexed by `MonthNumeral`."""
+
+
+@dataclass(frozen=True, order=True, slots=True)
 class Month:
     year: int
     month: MonthNumeral
@@ -46,7 +48,14 @@ class Month:
         """Returns the range of dates this month spans."""
 
         first_day = self.day(1)
-        return DateRange.half_open(first_day, first_day + relativedelta(months=1))
+        return DateRange.half_open(first_day, first_day + timedelta(days=self.days))
+
+    @property
+    def days(self) -> int:
+        """The number of days in this month."""
+
+        # Only February varies, so a table lookup is enough rather than calendar calculations.
+        return _DAYS_IN_MONTH[self.month] + (self.month == 2 and isleap(self.year))
 
     def day(self, day: DayOfMonthNumeral, /) -> date:
         """Creates a date within this month.
@@ -60,11 +69,7 @@ class Month:
 
             An invalid date would be, for example, February 30th."""
 
-        try:
-            self.day(day)
-            return True
-        except ValueError:
-            return False
+        return 1 <= day <= self.days
 
     def __contains__(self, d: date | datetime, /) -> bool:
         """Checks if a date or datetime is within this month.
@@ -78,7 +83,9 @@ class Month:
         """Adds a number of months."""
 
         if isinstance(months, int):
-            return self.of(self.day(1) + relativedelta(months=months))
+            # Month arithmetic is just base-12 integer arithmetic, no need for calendar logic.
+            year, month_idx = divmod(self.year * 12 + self.month - 1 + months, 12)
+            return type(self)(year, cast(MonthNumeral, month_idx + 1))
         else:
             return NotImplemented
 
@@ -91,7 +98,7 @@ class Month:
             return NotImplemented
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Week:
     """A seven-day week starting Monday."""
 
@@ -111,14 +118,14 @@ class Week:
     def date_range(self) -> 'DateRange':
         """Returns the range of dates this week spans."""
 
-        return DateRange.half_open(self.start, self.start + relativedelta(weeks=1))
+        return DateRange.half_open(self.start, self.start + timedelta(weeks=1))
 
     def day(self, day: DayOfWeekNumeral, /) -> date:
         """Creates a date within this week. Note that 0 is Monday."""
 
         if not 0 <= day <= 6:
             raise ValueError('day must be in the range [0, 6]')
-        return self.start + relativedelta(weekday=day)
+        return date.fromordinal(self.start.toordinal() + day)
 
     def __contains__(self, d: date | datetime, /) -> bool:
         """Checks if a date or datetime is within this week.
@@ -126,13 +133,13 @@ class Week:
 
         if isinstance(d, datetime):
             d = d.date()
-        return d in self.date_range
+        return 0 <= (d - self.start).days < 7
 
     def __add__(self, weeks: int, /) -> 'Week':
         """Adds a number of weeks."""
 
         if isinstance(weeks, int):
-            return self.of(self.start + relativedelta(weeks=weeks))
+            return type(self)(self.start + timedelta(weeks=weeks))
         else:
             return NotImplemented
 
@@ -281,10 +288,9 @@ class DateRange:
     def __iter__(self) -> Iterator[date]:
         """Iterates all dates within the range, in chronological order."""
 
-        d = self.inclusive_lower_bound
-        while d < self.exclusive_upper_bound:
-            yield d
-            d += timedelta(days=1)
+        # Iterating ordinals keeps the loop in C, rather than adding a timedelta per day.
+        ordinals = range(self.inclusive_lower_bound.toordinal(), self.exclusive_upper_bound.toordinal())
+        return map(date.fromordinal, ordinals)
 
     def __len__(self) -> int:
         return self.days
@@ -100,6 +100,8 @@ class CashFlowAnalysis:
         self._cash_flows = tuple(cash_flows)
         self._date_range = date_range
         self._certainty_tolerance = certainty_tolerance
+        # Totals only depend on the cash flow, since the date range and tolerance are fixed for the analysis.
+        self._cash_flow_totals: dict[ScheduledCashFlow, FloatDistribution] = {}
 
     def log_cash_flows(self) -> None:
         """Prints a human-readable description for each cash flow event."""
@@ -113,12 +115,17 @@ class CashFlowAnalysis:
 
     def summarise_cash_flows(self, label: str, cash_flow_filter: Callable[[ScheduledCashFlow], bool]) -> None:
         cash_flows = tuple(filter(cash_flow_filter, self._cash_flows))
-        total = sum(
-            (summarise_total_cash_flow(cash_flow, self._date_range, certainty_tolerance=self._certainty_tolerance)
-             for cash_flow in cash_flows),
-            FloatDistribution(min=0, mean=0, max=0))
+        total = FloatDistribution.sum_all(map(self._total_cash_flow, cash_flows))
         print(f'Total {label}: ${total.to_str(2)}')
 
+    def _total_cash_flow(self, cash_flow: ScheduledCashFlow, /) -> FloatDistribution:
+        total = self._cash_flow_totals.get(cash_flow)
+        if total is None:
+            total = summarise_total_cash_flow(
+                cash_flow, self._date_range, certainty_tolerance=self._certainty_tolerance)
+            self._cash_flow_totals[cash_flow] = total
+        return total
+
     # TODO: fix the issue with Mapping variance
     def plot_balances_over_time(self, endpoints: Collection[CashEndpoint],
             initial_balances: Mapping[CashEndpoint, float] = {}) -> None:
@@ -1,13 +1,18 @@
 from bisect import bisect_left, bisect_right
 from collections import defaultdict
 from collections.abc import Iterable, Mapping
-from dataclasses import dataclass, replace
-from typing import Callable, Generic, TypeVar, Union
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from itertools import accumulate
+from math import copysign, isfinite
+from operator import attrgetter, lt
+from typing import Any, Callable, Generic, TypeVar, Union
 
 from .utility import Ordered
 
 
 __all__ = [
+    'certainty_threshold',
     'clamp_certain',
     'DEFAULT_CERTAINTY_TOLERANCE',
     'DiscreteDistribution',
@@ -24,28 +29,41 @@ T_Ordered2 = TypeVar('T_Ordered2', bound=Ordered)
 DEFAULT_CERTAINTY_TOLERANCE = 1e-6
 """Default tolerance when deciding if a probability is "certain"."""
 
+_DEFAULT_CERTAINTY_THRESHOLD = 1 - DEFAULT_CERTAINTY_TOLERANCE
+
+
+def certainty_threshold(tolerance: float = DEFAULT_CERTAINTY_TOLERANCE, /) -> float:
+    """Computes the lowest probability that is considered "certain" for the given tolerance.
+
+        Useful for validating the tolerance once when checking many probabilities, e.g. in a loop."""
+
+    if tolerance == DEFAULT_CERTAINTY_TOLERANCE:
+        return _DEFAULT_CERTAINTY_THRESHOLD
+    elif tolerance < 0:
+        raise ValueError('tolerance must be >= 0')
+    else:
+        return 1 - tolerance
+
 
 def effectively_certain(probability: float, /, *, tolerance: float = DEFAULT_CERTAINTY_TOLERANCE) -> bool:
     """Checks if a probability is near enough to 1 to be considered "certain" for practical purposes.
         Often a probability won't be exactly 1 due to floating point inaccuracy."""
 
-    if tolerance < 0:
-        raise ValueError('tolerance must be >= 0')
-    else:
-        return probability >= 1 - tolerance
+    return probability >= certainty_threshold(tolerance)
 
 
 def clamp_certain(probability: float, /, *, tolerance: float = DEFAULT_CERTAINTY_TOLERANCE) -> float:
     """If `probability` is very near to 1, then returns 1. Else returns `probability`."""
 
-    if effectively_certain(probability, tolerance=tolerance):
-        return 1
-    else:
-        return probability
+    return 1 if probability >= certainty_threshold(tolerance) else probability
 
 
 @dataclass(frozen=True)
 class DiscreteOutcome(Generic[T_Ordered]):
+    # Slots are declared by hand rather than with dataclass(slots=True), which recreates the class and so breaks the
+    # frozen __setattr__ when instantiating via a subscripted alias (e.g. DiscreteOutcome[int](...)).
+    __slots__ = ('value', 'probability')
+
     value: T_Ordered
     probability: float      # The unconditional probability that the outcome is equal to `value`.
 
@@ -53,6 +71,10 @@ class DiscreteOutcome(Generic[T_Ordered]):
         if not 0 < self.probability <= 1:
             raise ValueError('probability must be in the range (0, 1]')
 
+    def __reduce__(self):
+        # Frozen instances with slots can't be restored by setting attributes, so pickle/copy via the constructor.
+        return type(self), (self.value, self.probability)
+
 
 @dataclass(frozen=True)
 class DiscreteDistribution(Generic[T_Ordered]):
@@ -71,20 +93,40 @@ class DiscreteDistribution(Generic[T_Ordered]):
                 - The sum of probabilities of all outcomes must be <= 1."""
 
         outcomes = tuple(outcomes)
-        if not all(outcomes[i].value < outcomes[i + 1].value for i in range(len(outcomes) - 1)):
+        values = tuple(outcome.value for outcome in outcomes)
+        # Pairwise comparison via map() avoids evaluating a Python expression per outcome.
+        if not all(map(lt, values, values[1:])):
             raise ValueError('outcomes must have strictly increasing values')
-        if sum(outcome.probability for outcome in outcomes) > 1:
+        # Prefix sums of probabilities, such that cumulative[i] is the total probability of the first i outcomes.
+        cumulative = tuple(accumulate((outcome.probability for outcome in outcomes), initial=0.0))
+        if cumulative[-1] > 1:
             raise ValueError('Sum of probabilities of all outcomes must be in <= 1')
-        super().__setattr__('outcomes', outcomes)
+        self._set_outcomes(outcomes, values, cumulative)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    @cached_property
+    def _hash(self) -> int:
+        # Distributions are immutable, so the hash can be computed once rather than walking all outcomes every time.
+        # It is computed on first use, since most intermediate distributions (e.g. from subset()) are never hashed.
+        return hash(self.outcomes)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Hashes of values such as str and date differ between processes, so the cached hash must not be pickled.
+        state = self.__dict__.copy()
+        state.pop('_hash', None)
+        return state
 
     @classmethod
     def from_weights(cls, value_weights: Mapping[T_Ordered, float], /):
         """Creates a distribution from a mapping of values to likelihood weights.
             The probability of each outcome is formed by normalising the weights to sum to 1."""
 
+        sorted_values = sorted(value_weights)
         total_weight = sum(value_weights.values())
-        value_probabilities = {value: weight / total_weight for value, weight in value_weights.items()}
-        return cls._from_probabilities(value_probabilities)
+        return cls._from_sorted_probabilities(
+            sorted_values, [value_weights[value] / total_weight for value in sorted_values])
 
     @classmethod
     def from_probabilities(cls, value_probabilities: Mapping[T_Ordered, float], /):
@@ -93,13 +135,16 @@ class DiscreteDistribution(Generic[T_Ordered]):
             If the sum of probabilities is very near 1, then the probabilities will be adjusted so that the sum is
             exactly 1."""
 
-        return cls._from_probabilities(value_probabilities)
+        sorted_values = sorted(value_probabilities)
+        return cls._from_sorted_probabilities(
+            sorted_values, [value_probabilities[value] for value in sorted_values])
 
     @classmethod
     def singular(cls, value: T_Ordered, /):
         """Creates a distribution with a single value with 100% probability."""
 
-        return cls.uniformly_of(value)
+        # -0.0 == 0.0, so the sign of float values is part of the cache key to stop them sharing an instance.
+        return cls._singular_cached(value, isinstance(value, float) and copysign(1, value) < 0)
 
     @classmethod
     def uniformly_in(cls, values: Iterable[T_Ordered], /):
@@ -129,12 +174,22 @@ class DiscreteDistribution(Generic[T_Ordered]):
         """Returns the sum of probability of all outcomes in the interval
             [`inclusive_lower_bound`, `exclusive_upper_bound`)."""
 
-        return sum(outcome.probability for outcome in self.iterate(inclusive_lower_bound, exclusive_upper_bound))
+        lower_idx, upper_idx = self._index_range(inclusive_lower_bound, exclusive_upper_bound)
+        return self._cumulative[upper_idx] - self._cumulative[lower_idx]
+
+    def possible_in(self, inclusive_lower_bound: T_Ordered, exclusive_upper_bound: T_Ordered) -> bool:
+        """Checks if any outcome in the interval [`inclusive_lower_bound`, `exclusive_upper_bound`) has nonzero
+            probability.
+
+            Equivalent to `probability_in(inclusive_lower_bound, exclusive_upper_bound) > 0`, but cheaper."""
+
+        outcome = self.lower_bound_inclusive(inclusive_lower_bound)
+        return outcome is not None and outcome.value < exclusive_upper_bound
 
     def cumulative_probability(self, value: T_Ordered, /) -> float:
         """Computes the total probability of outcomes with value <= `value`."""
 
-        cumulative = sum(outcome.probability for outcome in self.outcomes if outcome.value <= value)
+        cumulative = self._cumulative[bisect_right(self._values, value)]
         # Sum may exceed 1 slightly due to floating point error.
         return min(cumulative, 1)
 
@@ -142,7 +197,7 @@ class DiscreteDistribution(Generic[T_Ordered]):
         """Returns the outcome with the lowest value >= `value`and nonzero probability, or `None` if there is no such
             outcome."""
 
-        idx = bisect_left(self.outcomes, value, key=lambda outcome: outcome.value)
+        idx = bisect_left(self._values, value)
         if idx < len(self.outcomes):
             return self.outcomes[idx]
         else:
@@ -152,7 +207,7 @@ class DiscreteDistribution(Generic[T_Ordered]):
         """Returns the outcome with the highest value <= `value` and nonzero probability, or `None` if there is no such
             outcome."""
 
-        idx = bisect_right(self.outcomes, value, key=lambda outcome: outcome.value)
+        idx = bisect_right(self._values, value)
         if idx > 0:
             return self.outcomes[idx - 1]
         else:
@@ -163,15 +218,28 @@ class DiscreteDistribution(Generic[T_Ordered]):
         """Iterates outcomes within the interval [`inclusive_lower_bound`, `exclusive_upper_bound`) that have nonzero
             probability, in ascending order."""
 
-        return (outcome for outcome in self.outcomes if inclusive_lower_bound <= outcome.value < exclusive_upper_bound)
+        lower_idx, upper_idx = self._index_range(inclusive_lower_bound, exclusive_upper_bound)
+        return self.outcomes[lower_idx:upper_idx]
 
     def subset(self, func: Callable[[T_Ordered], bool], /):
         """Creates a new distribution where outcomes for which `func` returns false have 0 probability (i.e. removed).
 
             The occurrence probability of each remaining outcome is unchanged."""
 
-        filtered_outcomes = (outcome for outcome in self.outcomes if func(outcome.value))
-        return type(self)(filtered_outcomes)
+        filtered_outcomes = tuple(outcome for outcome in self.outcomes if func(outcome.value))
+        # A subsequence of valid outcomes is also valid, so no need to validate again.
+        return type(self)._unchecked(filtered_outcomes)
+
+    def subset_range(self, inclusive_lower_bound: T_Ordered, exclusive_upper_bound: T_Ordered):
+        """Creates a new distribution where outcomes outside the interval
+            [`inclusive_lower_bound`, `exclusive_upper_bound`) have 0 probability (i.e. removed).
+
+            Equivalent to `subset()` with a range predicate, but uses binary search rather than testing every outcome.
+            The occurrence probability of each remaining outcome is unchanged."""
+
+        lower_idx, upper_idx = self._index_range(inclusive_lower_bound, exclusive_upper_bound)
+        # A contiguous subsequence of valid outcomes is also valid, so no need to validate again.
+        return type(self)._unchecked(self.outcomes[lower_idx:upper_idx])
 
     def map_values(self, func: Callable[[T_Ordered], T_Ordered2], /):
         """Creates a new distribution with outcome values mapped by `func`.
@@ -180,51 +248,120 @@ class DiscreteDistribution(Generic[T_Ordered]):
             probabilities will be summed. However, the result must still be a valid distribution (e.g. total probability
             cannot exceed 1)."""
 
+        mapped_values = tuple(map(func, self._values))
+        probabilities = map(attrgetter('probability'), self.outcomes)
+        # Mappings are commonly strictly increasing (e.g. day of week to date), in which case the outcomes remain in
+        # order and there are no probabilities to combine. If the total is just short of 1, from_probabilities() must
+        # still be used below to correct it, as for any other mapping.
+        if (all(map(lt, mapped_values, mapped_values[1:]))
+                and not 0 < 1 - self._cumulative[-1] < self._CUMULATIVE_PROBABILITY_CLAMP):
+            # Probabilities are unchanged, so the outcomes are already valid and the prefix sums can be reused.
+            distribution = DiscreteDistribution.__new__(DiscreteDistribution)
+            distribution._set_outcomes(
+                tuple(map(DiscreteOutcome, mapped_values, probabilities)), mapped_values, self._cumulative)
+            return distribution
+
         value_probabilities: defaultdict[T_Ordered2, float] = defaultdict(float)
-        for outcome in self.outcomes:
-            value_probabilities[func(outcome.value)] += outcome.probability
+        for value, probability in zip(mapped_values, probabilities):
+            value_probabilities[value] += probability
         return DiscreteDistribution[T_Ordered2].from_probabilities(value_probabilities)
 
+    @classmethod
+    @lru_cache(maxsize=1024, typed=True)
+    def _singular_cached(cls, value: T_Ordered, negative: bool, /):
+        # Schedules create a singular distribution for every day they occur on, so share instances.
+        distribution = cls.__new__(cls)
+        # Values and prefix sums are trivial for a single outcome, so set them directly.
+        distribution._set_outcomes((DiscreteOutcome(value, 1.0),), (value,), (0.0, 1.0))
+        return distribution
+
+    @classmethod
+    def _unchecked(cls, outcomes: tuple[DiscreteOutcome[T_Ordered], ...],
+            cumulative: tuple[float, ...] | None = None, /):
+        """Creates a distribution without validating `outcomes`, which must already be known to satisfy the
+            requirements of `__init__` (e.g. a contiguous subsequence of another distribution's outcomes).
+
+            :param cumulative: Prefix sums of the outcome probabilities, if already known."""
+
+        if cumulative is None:
+            cumulative = tuple(accumulate((outcome.probability for outcome in outcomes), initial=0.0))
+        distribution = cls.__new__(cls)
+        distribution._set_outcomes(outcomes, tuple(outcome.value for outcome in outcomes), cumulative)
+        return distribution
+
+    def _set_outcomes(self, outcomes: tuple[DiscreteOutcome[T_Ordered], ...], values: tuple[T_Ordered, ...],
+            cumulative: tuple[float, ...], /) -> None:
+        object.__setattr__(self, 'outcomes', outcomes)
+        # Distributions are immutable, so values and cumulative probabilities can be cached for fast range queries.
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_cumulative', cumulative)
+
+    def _index_range(self, inclusive_lower_bound: T_Ordered, exclusive_upper_bound: T_Ordered, /) -> tuple[int, int]:
+        """Finds the start and end indices of outcomes within [`inclusive_lower_bound`, `exclusive_upper_bound`)."""
+
+        # Outcomes are sorted, so the interval can be located by binary search rather than testing every outcome.
+        lower_idx = bisect_left(self._values, inclusive_lower_bound)
+        upper_idx = bisect_left(self._values, exclusive_upper_bound, lo=lower_idx)
+        return lower_idx, upper_idx
+
     _CUMULATIVE_PROBABILITY_CLAMP = 1e-9
     """If the difference between a cumulative probability and 1 is less than this value, then the probability may be
         clamped to 1 in some circumstances to correct for floating point inaccuracy."""
 
     @classmethod
-    def _from_probabilities(cls, value_probabilities: Mapping[T_Ordered, float], /,
+    def _from_sorted_probabilities(cls, sorted_values: list[T_Ordered], probabilities: list[float], /,
             clamp_cumulative_down: float = _CUMULATIVE_PROBABILITY_CLAMP,
             clamp_cumulative_up: float = _CUMULATIVE_PROBABILITY_CLAMP):
-        outcomes: list[DiscreteOutcome[T_Ordered]] = []
-        sorted_values = sorted(value_probabilities.keys())
-        cumulative_probability = 0
-        for value in sorted_values:
-            probability = value_probabilities[value]
-            if probability <= 0:
-                raise ValueError('Probabilities must be > 0')
-            new_cumulative_probability = cumulative_probability + probability
-            # The cumulative probability may exceed 1 slightly due to floating point inaccuracy, which we can correct.
-            if clamp_cumulative_down and new_cumulative_probability > 1:
-                # Only do the correction the first time and if the error is small.
-                if cumulative_probability < 1 and (diff := new_cumulative_probability - 1) < clamp_cumulative_down:
-                    new_cumulative_probability = 1
-                    if outcomes:
-                        # Also need to reduce the outcome's probability to have a consistent distribution.
-                        probability -= diff
-                else:
-                    # Otherwise we assume the caller has provided invalid probabilities (e.g. total >> 1).
-                    raise ValueError('Sum of probabilities must not exceed 1')
-            outcomes.append(DiscreteOutcome(value, probability))
-            cumulative_probability = new_cumulative_probability
-        # Due to floating point inaccuracy, the final cumulative probability may be slightly less than 1 even if it
-        # should add up to 1, which we can correct for.
-        if clamp_cumulative_up and outcomes:
-            diff = 1 - cumulative_probability
-            if 0 < diff < clamp_cumulative_up:
-                # Also need to increase the last outcome's probability to have a consistent distribution.
-                outcomes[-1] = replace(outcomes[-1], probability=outcomes[-1].probability + diff)
-        return cls(outcomes)
-
-
-@dataclass(frozen=True, kw_only=True)
+        """Creates a distribution from distinct values in ascending order and their corresponding probabilities.
+            `probabilities` is modified in place."""
+
+        probabilities = _clamp_probabilities(probabilities, clamp_cumulative_down, clamp_cumulative_up)
+        # Values come from mapping keys, so are already known to be distinct and sorted, and the probabilities have
+        # just been validated, so the checks in __init__ only need to be repeated for the total probability.
+        cumulative = tuple(accumulate(probabilities, initial=0.0))
+        if cumulative[-1] > 1:
+            raise ValueError('Sum of probabilities of all outcomes must be in <= 1')
+        outcomes = tuple(map(DiscreteOutcome, sorted_values, probabilities))
+        distribution = cls.__new__(cls)
+        distribution._set_outcomes(outcomes, tuple(sorted_values), cumulative)
+        return distribution
+
+
+def _clamp_probabilities(probabilities: list[float], clamp_cumulative_down: float, clamp_cumulative_up: float, /) \
+        -> list[float]:
+    """Validates outcome probabilities (ordered by outcome value) and corrects small floating point errors in their
+        sum. `probabilities` is modified in place and returned."""
+
+    if any(probability <= 0 for probability in probabilities):
+        raise ValueError('Probabilities must be > 0')
+    cumulative_probabilities = list(accumulate(probabilities))
+    total_probability = cumulative_probabilities[-1] if cumulative_probabilities else 0
+    # The cumulative probability may exceed 1 slightly due to floating point inaccuracy, which we can correct.
+    if clamp_cumulative_down and total_probability > 1:
+        # Cumulative probabilities are strictly increasing, so the first to exceed 1 can be found by binary search.
+        idx = bisect_right(cumulative_probabilities, 1)
+        previous_cumulative_probability = cumulative_probabilities[idx - 1] if idx > 0 else 0
+        # Only do the correction if the first outcome to exceed 1 is the last outcome and the error is small.
+        if (idx == len(probabilities) - 1 and previous_cumulative_probability < 1
+                and (diff := total_probability - 1) < clamp_cumulative_down):
+            total_probability = 1
+            if idx > 0:
+                # Also need to reduce the outcome's probability to have a consistent distribution.
+                probabilities[idx] -= diff
+        else:
+            # Otherwise we assume the caller has provided invalid probabilities (e.g. total >> 1).
+            raise ValueError('Sum of probabilities must not exceed 1')
+    # Due to floating point inaccuracy, the final cumulative probability may be slightly less than 1 even if it
+    # should add up to 1, which we can correct for.
+    if clamp_cumulative_up and probabilities:
+        diff = 1 - total_probability
+        if 0 < diff < clamp_cumulative_up:
+            # Also need to increase the last outcome's probability to have a consistent distribution.
+            probabilities[-1] += diff
+    return probabilities
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
 class FloatDistribution:
     """A basic probability distribution on the real numbers."""
 
@@ -240,7 +377,7 @@ class FloatDistribution:
     def singular(cls, value: float, /):
         """Creates a distribution with a single value with 100% probability."""
 
-        return cls(min=value, max=value, mean=value)
+        return cls._singular_cached(value, copysign(1, value) < 0)
 
     @classmethod
     def uniformly_in(cls, lower_bound: float, upper_bound: float):
@@ -268,25 +405,45 @@ class FloatDistribution:
             max = mean
         return cls(min=min, mean=mean, max=max)
 
+    @classmethod
+    def sum_all(cls, distributions: Iterable['FloatDistribution'], /):
+        """Computes the sum of many distributions.
+
+            Equivalent to adding the distributions one by one, but without creating intermediate distributions."""
+
+        total_min = total_mean = total_max = 0
+        for distribution in distributions:
+            total_min += distribution.min
+            total_mean += distribution.mean
+            total_max += distribution.max
+        return cls(min=total_min, mean=total_mean, max=total_max)
+
     def to_str(self, decimals: int = 2) -> str:
         if decimals < 0:
             raise ValueError('decimals must be nonnegative')
 
-        def float_to_str(value: float) -> str:
-            return format(round(value, decimals), f'.{decimals}f')
-
         if abs(self.min - self.max) < 10 ** -decimals:
-            return f'{float_to_str(self.min)}'
+            return f'{round(self.min, decimals):.{decimals}f}'
         else:
-            return f'[{float_to_str(self.min)}, ({float_to_str(self.mean)}), {float_to_str(self.max)}]'
+            return (f'[{round(self.min, decimals):.{decimals}f}, ({round(self.mean, decimals):.{decimals}f}), '
+                f'{round(self.max, decimals):.{decimals}f}]')
 
     def __neg__(self):
         return type(self)(min=-self.max, max=-self.min, mean=-self.mean)
 
     def __add__(self, other: Union[float, 'FloatDistribution'], /) -> 'FloatDistribution':
-        if isinstance(other, (float, int)):
+        # Exact type checks are much cheaper than isinstance() for the common scalar types.
+        # Adding zero is common when accumulating (e.g. with sum()), in which case no new instance is required.
+        if (other_type := type(other)) is float or other_type is int or isinstance(other, (float, int)):
+            if other == 0:
+                return self
             return type(self)(min=self.min + other, max=self.max + other, mean=self.mean + other)
         elif isinstance(other, FloatDistribution):
+            # Note min <= mean <= max, so min == max == 0 implies mean == 0.
+            if other is _ZERO_SINGULAR or other.min == other.max == 0:
+                return self
+            if self is _ZERO_SINGULAR or self.min == self.max == 0:
+                return other
             # Is this legit maths?
             return type(self)(min=self.min + other.min, max=self.max + other.max, mean=self.mean + other.mean)
         else:
@@ -296,8 +453,14 @@ class FloatDistribution:
         return self + other
 
     def __mul__(self, other: float, /) -> 'FloatDistribution':
-        if isinstance(other, (float, int)):
-            if other >= 0:
+        # Exact type checks are much cheaper than isinstance() for the common scalar types.
+        if (other_type := type(other)) is float or other_type is int or isinstance(other, (float, int)):
+            if other == 1:
+                return self
+            elif other == 0 and isfinite(self.min) and isfinite(self.max):
+                # Infinite bounds give NaN, so leave those to the general case (which rejects them).
+                return type(self).singular(0)
+            elif other > 0:
                 return type(self)(min=self.min * other, max=self.max * other, mean=self.mean * other)
             else:
                 # If multiplier is negative, need to swap min and max.
@@ -307,3 +470,14 @@ class FloatDistribution:
 
     def __rmul__(self, other: float, /):
         return self * other
+
+    @classmethod
+    @lru_cache(maxsize=128, typed=True)
+    def _singular_cached(cls, value: float, negative: bool, /):
+        # Singular distributions (zero in particular) are created very frequently, so share instances.
+        # The sign is part of the key because -0.0 == 0.0, but they must not share an instance.
+        return cls(min=value, max=value, mean=value)
+
+
+_ZERO_SINGULAR = FloatDistribution.singular(0)
+"""Shared zero distribution, the identity element for addition."""
@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_right
 from calendar import FRIDAY, SATURDAY
 from collections.abc import Collection, Iterable, Sequence
 from dataclasses import dataclass
 from datetime import date
-from typing import Callable
+from functools import cached_property
+from itertools import compress, cycle
+from weakref import WeakKeyDictionary
 
 from .date_time import DateRange, DayOfMonthNumeral, DayOfWeekNumeral, Month, Week
 from .probability import DiscreteDistribution
@@ -46,7 +49,25 @@ class EventSchedule(ABC):
 
         raise NotImplementedError()
 
-    # TODO? cache schedule iteration
+    def iterate_cached(self, date_range: DateRange, /) -> tuple[DateDistribution, ...]:
+        """Equivalent to `tuple(iterate(date_range))`, but reuses the result if the same range was last requested.
+
+            The result is only valid while the schedule is unchanged, including any mutable collections it holds (e.g. a
+            list of `distributions`). Schedules which can't be hashed or weakly referenced are iterated every time."""
+
+        try:
+            cached = _iterate_cache.get(self)
+        except TypeError:
+            return tuple(self.iterate(date_range))
+        if cached is not None and cached[0] == date_range:
+            return cached[1]
+        events = tuple(self.iterate(date_range))
+        _iterate_cache[self] = (date_range, events)
+        return events
+
+
+_iterate_cache: WeakKeyDictionary[EventSchedule, tuple[DateRange, tuple[DateDistribution, ...]]] = WeakKeyDictionary()
+"""The most recent result of `EventSchedule.iterate_cached()` for each schedule."""
 
 
 class Never(EventSchedule):
@@ -62,16 +83,25 @@ class Once(EventSchedule):
 
     date: date | DateDistribution
 
-    def iterate(self, date_range: DateRange, /) -> tuple[DateDistribution] | tuple[()]:
+    def __post_init__(self) -> None:
+        # The result of a successful iteration never changes, so it can be created once and shared.
         match self.date:
-            case DiscreteDistribution() as distribution \
-                    if distribution.probability_in(
-                        date_range.inclusive_lower_bound, date_range.exclusive_upper_bound) > 0:
-                return (distribution,)
-            case date() as d if d in date_range:
-                return (DateDistribution.singular(d),)
+            case DiscreteDistribution() as distribution:
+                object.__setattr__(self, '_occurrences', (distribution,))
+            case date() as d:
+                object.__setattr__(self, '_occurrences', (DateDistribution.singular(d),))
             case _:
-                return ()
+                object.__setattr__(self, '_occurrences', ())
+
+    def iterate(self, date_range: DateRange, /) -> tuple[DateDistribution] | tuple[()]:
+        # Plain isinstance checks rather than match, as this is called for every analysed event.
+        occurrence = self.date
+        if isinstance(occurrence, DiscreteDistribution):
+            if occurrence.possible_in(date_range.inclusive_lower_bound, date_range.exclusive_upper_bound):
+                return self._occurrences
+        elif isinstance(occurrence, date) and occurrence in date_range:
+            return self._occurrences
+        return ()
 
 
 @dataclass(frozen=True, eq=False)
@@ -81,9 +111,14 @@ class Daily(EventSchedule):
     range: DateRange = DateRange.all()
     exclude: Collection[date | DateRange] = ()
 
+    def __post_init__(self) -> None:
+        _Exclusions.capture(self)
+
     def iterate(self, date_range: DateRange, /) -> Iterable[DateDistribution]:
-        return (DateDistribution.singular(occurrence) for occurrence in date_range & self.range
-                if not _is_occurrence_excluded(occurrence, self.exclude))
+        occurrences: Iterable[date] = date_range & self.range
+        if self._exclusions:
+            occurrences = filter(self._exclusions.allows, occurrences)
+        return map(DateDistribution.singular, occurrences)
 
 
 @dataclass(frozen=True, eq=False)
@@ -93,9 +128,14 @@ class Weekdays(EventSchedule):
     range: DateRange = DateRange.all()
     exclude: Collection[date | DateRange] = ()
 
+    def __post_init__(self) -> None:
+        _Exclusions.capture(self)
+
     def iterate(self, date_range: DateRange, /) -> Iterable[DateDistribution]:
-        return (DateDistribution.singular(occurrence) for occurrence in date_range & self.range
-                if occurrence.weekday() <= FRIDAY and not _is_occurrence_excluded(occurrence, self.exclude))
+        occurrences = _on_days_of_week(date_range & self.range, _WEEKDAYS)
+        if self._exclusions:
+            occurrences = filter(self._exclusions.allows, occurrences)
+        return map(DateDistribution.singular, occurrences)
 
 
 @dataclass(frozen=True, eq=False)
@@ -105,9 +145,14 @@ class Weekends(EventSchedule):
     range: DateRange = DateRange.all()
     exclude: Collection[date | DateRange] = ()
 
+    def __post_init__(self) -> None:
+        _Exclusions.capture(self)
+
     def iterate(self, date_range: DateRange, /) -> Iterable[DateDistribution]:
-        return (DateDistribution.singular(occurrence) for occurrence in date_range & self.range
-                if occurrence.weekday() >= SATURDAY and not _is_occurrence_excluded(occurrence, self.exclude))
+        occurrences = _on_days_of_week(date_range & self.range, _WEEKENDS)
+        if self._exclusions:
+            occurrences = filter(self._exclusions.allows, occurrences)
+        return map(DateDistribution.singular, occurrences)
 
 
 DayOfWeekDistribution = DiscreteDistribution[DayOfWeekNumeral]
@@ -152,6 +197,7 @@ class Weekly(EventSchedule):
             raise ValueError('period must be >= 1')
         if self.period != 1 and not self.range.has_proper_lower_bound:
             raise ValueError('range must have a lower bound if period is not 1')
+        _Exclusions.capture(self)
 
     def iterate(self, date_range: DateRange, /) -> Iterable[DateDistribution]:
         # Methodology is to iterate over weeks, then within each week, iterate the specified days.
@@ -159,24 +205,32 @@ class Weekly(EventSchedule):
         date_range &= self.range
         if date_range:
             day_schedule = self._day_schedule
+            exclusions = self._exclusions
+            period = self.period
+            lower_bound = date_range.inclusive_lower_bound
+            upper_bound = date_range.exclusive_upper_bound
 
-            start_week = Week.of(self.range.inclusive_lower_bound)
             week = Week.of(date_range.first_day)
             last_week = Week.of(date_range.inclusive_upper_bound)
 
-            while week <= last_week:
-                period_diff = (week - start_week) % self.period
-                if period_diff == 0:
-                    for day_distribution in day_schedule.iterate(week):
-                        date_distribution = day_distribution.map_values(week.day)
+            # Matching weeks form an arithmetic progression, so skip to the first one and then step by the period.
+            week += (self._start_week - week) % period
+            # Count the matching weeks with integer arithmetic rather than comparing Week objects each iteration.
+            for _ in range(0, last_week - week + 1, period):
+                for day_distribution in day_schedule.iterate(week):
+                    date_distribution = day_distribution.map_values(week.day)
+                    if exclusions:
                         # Note that the probabilities of other occurences are not affected by the excluded occurences.
-                        date_distribution = date_distribution.subset(_excluded_occurrence_filter(self.exclude))
-                        if date_distribution.probability_in(
-                                date_range.inclusive_lower_bound, date_range.exclusive_upper_bound) > 0:
-                            yield date_distribution
-                week += self.period - period_diff
+                        date_distribution = date_distribution.subset(exclusions.allows)
+                    if date_distribution.possible_in(lower_bound, upper_bound):
+                        yield date_distribution
+                week += period
 
-    @property
+    @cached_property
+    def _start_week(self) -> Week:
+        return Week.of(self.range.inclusive_lower_bound)
+
+    @cached_property
     def _day_schedule(self) -> DayOfWeekSchedule:
         match self.day:
             case DayOfWeekSchedule() as schedule:
@@ -216,9 +270,22 @@ class SimpleDayOfMonthSchedule(DayOfMonthSchedule):
     distributions: Sequence[DayOfMonthDistribution]
 
     def iterate(self, month: Month, /) -> Iterable[DayOfMonthDistribution]:
-        # Note that the probabilities of other days are not affected by removing the invalid dates.
-        distributions = (distribution.subset(month.has_day) for distribution in self.distributions)
-        return (distribution for distribution in distributions if distribution.has_possible_outcomes)
+        days = month.days
+        by_length = self._distributions_by_month_length
+        distributions = by_length.get(days)
+        if distributions is None:
+            # Which days are valid depends only on the length of the month, so each length is computed at most once.
+            # Note that the probabilities of other days are not affected by removing the invalid dates.
+            distributions = tuple(
+                distribution for distribution in (d.subset_range(1, days + 1) for d in self.distributions)
+                if distribution.has_possible_outcomes)
+            by_length[days] = distributions
+        return distributions
+
+    @cached_property
+    def _distributions_by_month_length(self) -> dict[int, tuple[DayOfMonthDistribution, ...]]:
+        # Filled lazily by iterate(), since many simulations only ever see one or two month lengths.
+        return {}
 
 
 @dataclass(frozen=True, eq=False)
@@ -239,6 +306,7 @@ class Monthly(EventSchedule):
             raise ValueError('period must be >= 1')
         if self.period != 1 and not self.range.has_proper_lower_bound:
             raise ValueError('range must have a lower bound if period is not 1')
+        _Exclusions.capture(self)
 
     def iterate(self, date_range: DateRange, /) -> Iterable[DateDistribution]:
         # Methodology is to iterate over possible months, then within each month, iterate the specified days.
@@ -246,24 +314,32 @@ class Monthly(EventSchedule):
         date_range &= self.range
         if date_range:
             day_schedule = self._day_schedule
+            exclusions = self._exclusions
+            period = self.period
+            lower_bound = date_range.inclusive_lower_bound
+            upper_bound = date_range.exclusive_upper_bound
 
-            start_month = Month.of(self.range.inclusive_lower_bound)
             month = Month.of(date_range.first_day)
             last_month = Month.of(date_range.inclusive_upper_bound)
 
-            while month <= last_month:
-                period_diff = (month - start_month) % self.period
-                if period_diff == 0:
-                    for day_distribution in day_schedule.iterate(month):
-                        date_distribution = day_distribution.map_values(month.day)
+            # Matching months form an arithmetic progression, so skip to the first one and then step by the period.
+            month += (self._start_month - month) % period
+            # Count the matching months with integer arithmetic rather than comparing Month objects each iteration.
+            for _ in range(0, last_month - month + 1, period):
+                for day_distribution in day_schedule.iterate(month):
+                    date_distribution = day_distribution.map_values(month.day)
+                    if exclusions:
                         # Note that the probabilities of other occurences are not affected by the excluded occurences.
-                        date_distribution = date_distribution.subset(_excluded_occurrence_filter(self.exclude))
-                        if date_distribution.probability_in(
-                                date_range.inclusive_lower_bound, date_range.exclusive_upper_bound) > 0:
-                            yield date_distribution
-                month += self.period - period_diff
+                        date_distribution = date_distribution.subset(exclusions.allows)
+                    if date_distribution.possible_in(lower_bound, upper_bound):
+                        yield date_distribution
+                month += period
+
+    @cached_property
+    def _start_month(self) -> Month:
+        return Month.of(self.range.inclusive_lower_bound)
 
-    @property
+    @cached_property
     def _day_schedule(self) -> DayOfMonthSchedule:
         match self.day:
             case DayOfMonthSchedule() as schedule:
@@ -274,20 +350,74 @@ class Monthly(EventSchedule):
                 raise TypeError('day')
 
 
-def _is_occurrence_excluded(occurrence: date, excluded: Collection[date | DateRange]) -> bool:
-    for exclude in excluded:
-        match exclude:
-            case date() as d if occurrence == d:
-                return True
-            case DateRange() as date_range if occurrence in date_range:
-                return True
-            case _:
-                pass
-    return False
+_WEEKDAYS = tuple(day <= FRIDAY for day in range(7))
+_WEEKENDS = tuple(day >= SATURDAY for day in range(7))
+
+
+def _on_days_of_week(date_range: DateRange, days: tuple[bool, ...], /) -> Iterable[date]:
+    """Iterates dates within `date_range` whose day of week is selected by `days` (indexed by day of week)."""
+
+    # Days of week repeat every 7 days, so a rotated selector can be cycled over the range without testing each date.
+    first_day = date_range.inclusive_lower_bound.weekday()
+    return compress(date_range, cycle(days[first_day:] + days[:first_day]))
+
+
+class _Exclusions:
+    """Set of excluded dates and date ranges, preprocessed for fast membership tests."""
+
+    def __init__(self, exclude: Collection[date | DateRange], /) -> None:
+        self._dates = frozenset(excluded for excluded in exclude if isinstance(excluded, date))
+        ranges = sorted((excluded for excluded in exclude if isinstance(excluded, DateRange) and not excluded.is_empty),
+            key=lambda excluded: excluded.inclusive_lower_bound)
+        # Merge overlapping ranges so that only one range can contain a given date, which permits binary search.
+        lower_bounds: list[date] = []
+        upper_bounds: list[date] = []
+        for excluded in ranges:
+            if upper_bounds and excluded.inclusive_lower_bound <= upper_bounds[-1]:
+                upper_bounds[-1] = max(upper_bounds[-1], excluded.exclusive_upper_bound)
+            else:
+                lower_bounds.append(excluded.inclusive_lower_bound)
+                upper_bounds.append(excluded.exclusive_upper_bound)
+        self._range_lower_bounds = tuple(lower_bounds)
+        self._range_upper_bounds = tuple(upper_bounds)
+
+    @classmethod
+    def capture(cls, schedule: 'Daily | Weekdays | Weekends | Weekly | Monthly', /) -> None:
+        """Preprocesses a schedule's `exclude` for its `iterate()`.
+
+            `exclude` is copied to a tuple, so that later changes to the caller's collection can't be silently ignored
+            by the preprocessed exclusions (or by `EventSchedule.iterate_cached()`)."""
+
+        exclude = tuple(schedule.exclude)
+        object.__setattr__(schedule, 'exclude', exclude)
+        object.__setattr__(schedule, '_exclusions', cls.of(exclude))
+
+    @classmethod
+    def of(cls, exclude: Collection[date | DateRange], /) -> '_Exclusions':
+        """Preprocesses `exclude`. Most schedules exclude nothing, so share one instance for that case."""
+
+        if exclude:
+            return cls(exclude)
+        else:
+            return _NO_EXCLUSIONS
+
+    def __bool__(self) -> bool:
+        """Checks if anything is excluded at all."""
+
+        return bool(self._dates or self._range_lower_bounds)
+
+    def __contains__(self, occurrence: date, /) -> bool:
+        """Checks if `occurrence` is excluded."""
+
+        if occurrence in self._dates:
+            return True
+        idx = bisect_right(self._range_lower_bounds, occurrence) - 1
+        return idx >= 0 and occurrence < self._range_upper_bounds[idx]
+
+    def allows(self, occurrence: date, /) -> bool:
+        """Checks if `occurrence` is not excluded."""
 
+        return occurrence not in self
 
-def _excluded_occurrence_filter(exclude: Collection[date | DateRange], /) -> Callable[[date], bool]:
-    def inner(occurrence: date):
-        return not _is_occurrence_excluded(occurrence, exclude)
 
-    return inner
+_NO_EXCLUSIONS = _Exclusions(())
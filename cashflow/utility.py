@@ -2,6 +2,7 @@ from abc import abstractmethod
 from collections.abc import Iterable
 from datetime import date
 from heapq import merge
+from operator import attrgetter
 from typing import Any, Protocol, TypeVar
 
 
@@ -45,4 +46,4 @@ def merge_by_date(iterables: Iterable[Iterable[T_HasDate]]) -> Iterable[T_HasDat
     """Merges multiple sorted iterables into one sorted iterable.
         Objects are ordered by their `date` attribute."""
 
-    return merge(*iterables, key=lambda item: item.date)
+    return merge(*iterables, key=attrgetter('date'))
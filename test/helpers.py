@@ -1,6 +1,8 @@
-from collections.abc import Mapping, Sequence
+from collections.abc import Callable, Mapping, Sequence
 from dataclasses import fields, is_dataclass
+from functools import lru_cache
 from math import isclose
+from operator import attrgetter
 from typing import Any
 
 
@@ -27,34 +29,105 @@ class approx_floats:
         if isinstance(other, approx_floats):
             raise TypeError()
 
-        if {type(self._value), type(other)} in ({float}, {float, int}):
-            # Float comparing against float or int - use tolerance.
-            return isclose(self._value, other, rel_tol=self._rel_tol, abs_tol=self._abs_tol)
-        elif isinstance(self._value, str) and isinstance(other, str):
-            # str is a sequence of str, annoyingly, so must be handled separately.
-            return self._value == other
-        elif isinstance(self._value, Sequence) and isinstance(other, Sequence) and type(self._value) == type(other):
-            # Comparing two sequences of same type - recurse into elements.
-            return (len(self._value) == len(other) and
-                    all(type(self)(e1) == e2 for e1, e2 in zip(self._value, other)))
-        elif isinstance(self._value, Mapping) and isinstance(other, Mapping) and type(self._value) == type(other):
-            # Comparing two mappings of same type - recurse into values.
-            # Note floats as keys are not compared with tolerance. Floats probably shouldn't be used as keys anyway.
-            return (self._value.keys() == other.keys() and
-                    all(type(self)(self._value[key]) == other[key] for key in self._value.keys()))
-        elif is_dataclass(self._value) and is_dataclass(other) and type(self._value) == type(other):
-            # Comparing two dataclasses of same type - recurse into fields.
-            return all(type(self)(getattr(self._value, field.name)) == getattr(other, field.name)
-                        for field in fields(self._value))
-        elif type(self._value) == type(other):
-            # Comparing any other values of the same type - must be exactly equal.
-            return self._value == other
-        else:
-            # Comparing two values of differing types - in a unit test, probably a mistake.
-            raise TypeError()
+        return _approx_equal(self._value, other, self._rel_tol, self._abs_tol)
 
     def __str__(self) -> str:
         return f'{type(self).__name__}({self._value})'
 
     def __repr__(self) -> str:
         return str(self)
+
+
+# Nested values are compared directly rather than by wrapping each one in another approx_floats.
+_Comparison = Callable[[Any, Any, float, float], bool]
+
+
+def _approx_equal(value: Any, other: Any, rel_tol: float, abs_tol: float, /) -> bool:
+    return _comparison_for(type(value))(value, other, rel_tol, abs_tol)
+
+
+@lru_cache(maxsize=None)
+def _comparison_for(value_type: type, /) -> _Comparison:
+    """Selects how to compare a value of type `value_type`.
+        The choice depends only on the type, so is made once per type rather than on every comparison."""
+
+    if value_type is float:
+        return _compare_float
+    elif value_type is int:
+        return _compare_int
+    elif issubclass(value_type, str):
+        # str is a sequence of str, annoyingly, so must be handled separately.
+        return _compare_str
+    elif issubclass(value_type, Sequence):
+        return _compare_sequence
+    elif issubclass(value_type, Mapping):
+        return _compare_mapping
+    elif is_dataclass(value_type):
+        return _compare_dataclass
+    else:
+        return _compare_exact
+
+
+def _compare_float(value: float, other: Any, rel_tol: float, abs_tol: float, /) -> bool:
+    if type(other) is float or type(other) is int:
+        # Float comparing against float or int - use tolerance.
+        return isclose(value, other, rel_tol=rel_tol, abs_tol=abs_tol)
+    else:
+        return _compare_exact(value, other, rel_tol, abs_tol)
+
+
+def _compare_int(value: int, other: Any, rel_tol: float, abs_tol: float, /) -> bool:
+    if type(other) is float:
+        # Int comparing against float - use tolerance.
+        return isclose(value, other, rel_tol=rel_tol, abs_tol=abs_tol)
+    else:
+        return _compare_exact(value, other, rel_tol, abs_tol)
+
+
+def _compare_str(value: str, other: Any, rel_tol: float, abs_tol: float, /) -> bool:
+    if isinstance(other, str):
+        return value == other
+    else:
+        return _compare_exact(value, other, rel_tol, abs_tol)
+
+
+def _compare_sequence(value: Sequence, other: Any, rel_tol: float, abs_tol: float, /) -> bool:
+    if type(value) == type(other):
+        # Comparing two sequences of same type - recurse into elements.
+        return (len(value) == len(other) and
+                all(_approx_equal(e1, e2, rel_tol, abs_tol) for e1, e2 in zip(value, other)))
+    else:
+        return _compare_exact(value, other, rel_tol, abs_tol)
+
+
+def _compare_mapping(value: Mapping, other: Any, rel_tol: float, abs_tol: float, /) -> bool:
+    if type(value) == type(other):
+        # Comparing two mappings of same type - recurse into values.
+        # Note floats as keys are not compared with tolerance. Floats probably shouldn't be used as keys anyway.
+        return (value.keys() == other.keys() and
+                all(_approx_equal(value[key], other[key], rel_tol, abs_tol) for key in value.keys()))
+    else:
+        return _compare_exact(value, other, rel_tol, abs_tol)
+
+
+def _compare_dataclass(value: Any, other: Any, rel_tol: float, abs_tol: float, /) -> bool:
+    if type(value) == type(other):
+        # Comparing two dataclasses of same type - recurse into fields.
+        return all(_approx_equal(get_field(value), get_field(other), rel_tol, abs_tol)
+                    for get_field in _field_getters(type(other)))
+    else:
+        return _compare_exact(value, other, rel_tol, abs_tol)
+
+
+@lru_cache(maxsize=None)
+def _field_getters(dataclass_type: type, /) -> tuple[Callable[[Any], Any], ...]:
+    return tuple(attrgetter(field.name) for field in fields(dataclass_type))
+
+
+def _compare_exact(value: Any, other: Any, rel_tol: float, abs_tol: float, /) -> bool:
+    if type(value) == type(other):
+        # Comparing any other values of the same type - must be exactly equal.
+        return value == other
+    else:
+        # Comparing two values of differing types - in a unit test, probably a mistake.
+        raise TypeError()
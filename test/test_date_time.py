@@ -22,6 +22,14 @@ def test_month_date_range() -> None:
     expected = DateRange(inclusive_lower_bound=date(2022, 12, 1),exclusive_upper_bound=date(2023, 1, 1))
     assert m.date_range == expected
 
+def test_month_days() -> None:
+    assert Month(2022, 1).days == 31
+    assert Month(2022, 2).days == 28
+    assert Month(2020, 2).days == 29
+    assert Month(2022, 4).days == 30
+    assert Month(1900, 2).days == 28
+    assert Month(2000, 2).days == 29
+
 def test_month_day_valid() -> None:
     assert Month(2022, 7).day(12) == date(2022, 7, 12)
 
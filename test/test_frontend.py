@@ -0,0 +1,30 @@
+from datetime import date
+
+from pytest import MonkeyPatch, importorskip
+
+from cashflow.date_time import DateRange
+from cashflow.schedule import Monthly
+
+
+# The frontend plots with matplotlib, which is an optional dependency for testing.
+frontend = importorskip('cashflow.frontend', exc_type=ImportError)
+
+
+def test_cash_flow_analysis_summarise_cash_flows_repeated(monkeypatch: MonkeyPatch) -> None:
+    calls = []
+    summarise_total_cash_flow = frontend.summarise_total_cash_flow
+
+    def summarise_counted(cash_flow, *args, **kwargs):
+        calls.append(cash_flow)
+        return summarise_total_cash_flow(cash_flow, *args, **kwargs)
+
+    monkeypatch.setattr(frontend, 'summarise_total_cash_flow', summarise_counted)
+    builder = frontend.ScheduleBuilder(frontend.Account('account'))
+    income = builder.income('income', Monthly(1), 100)
+    expense = builder.expense('expense', Monthly(15), 40)
+    analysis = builder.make_analysis(DateRange.inclusive(date(2023, 1, 1), date(2023, 12, 31)))
+    analysis.summarise_cash_flows('all', lambda cash_flow: True)
+    analysis.summarise_cash_flows('all', lambda cash_flow: True)
+    # Each cash flow is summarised only once.
+    assert len(calls) == 2
+    assert set(calls) == {income, expense}
@@ -1,9 +1,24 @@
+import os
+import pickle
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
 from random import random
 
 from pytest import approx, raises
 
 from cashflow.probability import (
-    DiscreteDistribution, DiscreteOutcome, FloatDistribution, clamp_certain, effectively_certain)
+    DiscreteDistribution, DiscreteOutcome, FloatDistribution, certainty_threshold, clamp_certain, effectively_certain)
+
+
+def test_certainty_threshold_valid() -> None:
+    assert certainty_threshold(1e-3) == approx(0.999)
+    assert certainty_threshold(0) == 1
+
+def test_certainty_threshold_negative_tolerance() -> None:
+    with raises(ValueError):
+        certainty_threshold(-1e-9)
 
 
 def test_effectively_certain_within_tolerance() -> None:
@@ -40,6 +55,9 @@ def test_discrete_outcome_construct_invalid_probability() -> None:
     with raises(ValueError):
         DiscreteOutcome(1, 1.00000001)
 
+def test_discrete_outcome_construct_subscripted() -> None:
+    assert DiscreteOutcome[int](1, 0.5) == DiscreteOutcome(1, 0.5)
+
 
 def test_discrete_distribution_construct_invalid_order() -> None:
     with raises(ValueError):
@@ -49,6 +67,24 @@ def test_discrete_distribution_construct_invalid_order() -> None:
             DiscreteOutcome(1.5, 0.1)
         ])
 
+def test_discrete_distribution_hash() -> None:
+    d1 = DiscreteDistribution.from_weights({1: 1, 2: 3, 5: 2})
+    d2 = DiscreteDistribution.from_weights({1: 1, 2: 3, 5: 2})
+    assert hash(d1) == hash(d2)
+    assert {d1: 1}[d2] == 1
+
+def test_discrete_distribution_pickle() -> None:
+    # Date hashes are randomised per process, so pickle in a separate process to check the hash isn't carried over.
+    code = ('import pickle, sys; from datetime import date; from cashflow.probability import DiscreteDistribution; '
+            'd = DiscreteDistribution.uniformly_of(date(2023, 1, 1), date(2023, 1, 2)); hash(d); '
+            'sys.stdout.buffer.write(pickle.dumps(d))')
+    env = {**os.environ, 'PYTHONHASHSEED': '1', 'PYTHONPATH': str(Path(__file__).parents[1])}
+    pickled = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, check=True).stdout
+    d1 = pickle.loads(pickled)
+    d2 = DiscreteDistribution.uniformly_of(date(2023, 1, 1), date(2023, 1, 2))
+    assert d1 == d2
+    assert hash(d1) == hash(d2)
+
 def test_discrete_distribution_from_weights_valid() -> None:
     d = DiscreteDistribution.from_weights({1: 1, 2: 3, 5: 2})
     assert [o.value for o in d.outcomes] == [1, 2, 5]
@@ -78,6 +114,15 @@ def test_discrete_distribution_singular() -> None:
     d = DiscreteDistribution.singular(7.8)
     expected = DiscreteDistribution((DiscreteOutcome(7.8, 1),))
     assert d == expected
+    assert type(d.outcomes[0].probability) is float
+
+def test_discrete_distribution_singular_shared() -> None:
+    assert DiscreteDistribution.singular(7.8) is DiscreteDistribution.singular(7.8)
+    assert DiscreteDistribution.singular(7.8) is not DiscreteDistribution.singular(2)
+
+def test_discrete_distribution_singular_signed_zero() -> None:
+    assert str(DiscreteDistribution.singular(-0.0).outcomes[0].value) == '-0.0'
+    assert str(DiscreteDistribution.singular(0.0).outcomes[0].value) == '0.0'
 
 def test_discrete_distribution_uniformly_in_nonempty() -> None:
     d = DiscreteDistribution.uniformly_in((5, 1, 2))
@@ -120,6 +165,20 @@ def test_discrete_distribution_probability_in() -> None:
     assert d.probability_in(2, 5) == approx(0.15 + 0.04 + 0.2)
     assert d.probability_in(2, 2) == 0
 
+def test_discrete_distribution_possible_in() -> None:
+    d = DiscreteDistribution((
+        DiscreteOutcome(1, 0.3),
+        DiscreteOutcome(2, 0.15),
+        DiscreteOutcome(5, 0.2)
+    ))
+    assert d.possible_in(2, 5)
+    assert d.possible_in(0, 2)
+    assert d.possible_in(5, 100)
+    assert not d.possible_in(3, 5)
+    assert not d.possible_in(2, 2)
+    assert not d.possible_in(6, 100)
+    assert not DiscreteDistribution.null().possible_in(0, 100)
+
 def test_discrete_distribution_cumulative_probability() -> None:
     d = DiscreteDistribution.from_probabilities({
         1: 0.3,
@@ -183,6 +242,24 @@ def test_discrete_distribution_subset() -> None:
     # No floating point operations, should match exactly.
     assert result.outcomes == expected
 
+def test_discrete_distribution_subset_range() -> None:
+    d = DiscreteDistribution((
+        DiscreteOutcome(1, 0.3),
+        DiscreteOutcome(2, 0.15),
+        DiscreteOutcome(3, 0.04),
+        DiscreteOutcome(4, 0.2),
+        DiscreteOutcome(5, 0.2)
+    ))
+    result = d.subset_range(2, 5)
+    expected = DiscreteDistribution((
+        DiscreteOutcome(2, 0.15),
+        DiscreteOutcome(3, 0.04),
+        DiscreteOutcome(4, 0.2)
+    ))
+    assert result == expected
+    assert result.probability_in(0, 10) == approx(0.15 + 0.04 + 0.2)
+    assert not d.subset_range(6, 10).has_possible_outcomes
+
 def test_discrete_distribution_map_values_bijection() -> None:
     d = DiscreteDistribution.from_weights({1: 1, 2: 4, 4: 3})
     result = d.map_values(lambda v: v + 1)
@@ -190,6 +267,18 @@ def test_discrete_distribution_map_values_bijection() -> None:
     assert [o.probability for o in result.outcomes] == approx([1/8, 4/8, 3/8])
     assert sum(o.probability for o in d.outcomes) == 1
 
+def test_discrete_distribution_map_values_bijection_total_near_1() -> None:
+    d = DiscreteDistribution((DiscreteOutcome(1, 0.5), DiscreteOutcome(2, 0.5 - 1e-12)))
+    result = d.map_values(lambda v: v + 1)
+    assert [o.value for o in result.outcomes] == [2, 3]
+    assert result.cumulative_probability(3) == 1
+
+def test_discrete_distribution_map_values_decreasing() -> None:
+    d = DiscreteDistribution.from_weights({1: 1, 2: 4, 4: 3})
+    result = d.map_values(lambda v: -v)
+    assert [o.value for o in result.outcomes] == [-4, -2, -1]
+    assert [o.probability for o in result.outcomes] == approx([3/8, 4/8, 1/8])
+
 def test_discrete_distribution_map_values_not_bijection() -> None:
     d = DiscreteDistribution.uniformly_in(range(20))
     result = d.map_values(lambda v: v if v % 6 == 0 else v // 3)
@@ -225,6 +314,15 @@ def test_float_distribution_singular() -> None:
     assert d.max == 23.456
     assert d.mean == 23.456
 
+def test_float_distribution_singular_shared() -> None:
+    assert FloatDistribution.singular(0) is FloatDistribution.singular(0)
+    assert FloatDistribution.singular(1.5) is FloatDistribution.singular(1.5)
+    assert FloatDistribution.singular(0) is not FloatDistribution.singular(1.5)
+
+def test_float_distribution_singular_signed_zero() -> None:
+    assert FloatDistribution.singular(-0.0).to_str(2) == '-0.00'
+    assert FloatDistribution.singular(0.0).to_str(2) == '0.00'
+
 def test_float_distribution_uniformly_in() -> None:
     d = FloatDistribution.uniformly_in(-0.25, 2)
     assert d.min == approx(-0.25)
@@ -237,6 +335,19 @@ def test_float_distribution_uniformly_around() -> None:
     assert d.max == approx(14)
     assert d.mean == approx(10)
 
+def test_float_distribution_sum_all_empty() -> None:
+    assert FloatDistribution.sum_all(()) == FloatDistribution.singular(0)
+
+def test_float_distribution_sum_all_nonempty() -> None:
+    result = FloatDistribution.sum_all((
+        FloatDistribution(min=-1, max=3, mean=0.5),
+        FloatDistribution(min=2, max=2.5, mean=2.25),
+        FloatDistribution.singular(10)
+    ))
+    assert result.min == approx(11)
+    assert result.max == approx(15.5)
+    assert result.mean == approx(12.75)
+
 def test_float_distribution_to_str_singular() -> None:
     d = FloatDistribution.singular(123.456789)
     assert d.to_str(4) == '123.4568'
@@ -292,6 +403,12 @@ def test_float_distribution_add_distribution_fuzz() -> None:
         d2 = FloatDistribution(min=min2, mean=mean2, max=max2)
         d1 + d2
 
+def test_float_distribution_add_zero() -> None:
+    d = FloatDistribution(min=-1, max=2, mean=0.7)
+    assert d + 0 is d
+    assert d + FloatDistribution(min=0, max=0, mean=0) is d
+    assert FloatDistribution.singular(0) + d is d
+
 def test_float_distribution_radd_scalar() -> None:
     d = FloatDistribution(min=-1, max=2, mean=0.7)
     result = 17 + d
@@ -313,6 +430,16 @@ def test_float_distribution_mul_scalar_negative() -> None:
     assert result.max == approx(15)
     assert result.mean == approx(-4.65)
 
+def test_float_distribution_mul_scalar_identity() -> None:
+    d = FloatDistribution(min=-10, max=11, mean=3.1)
+    assert d * 1 is d
+    assert d * 0 == FloatDistribution(min=0, max=0, mean=0)
+
+def test_float_distribution_mul_scalar_zero_infinite() -> None:
+    d = FloatDistribution(min=-1, mean=0, max=float('inf'))
+    with raises(ValueError):
+        d * 0
+
 def test_float_distribution_mul_scalar_fuzz() -> None:
     for _ in range(50000):
         scale1 = random() * 1e6
@@ -1,3 +1,5 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
 from datetime import date
 
 from pytest import raises
@@ -5,12 +7,34 @@ from pytest import raises
 from cashflow.date_time import DateRange, Month, Week
 from cashflow.probability import DiscreteOutcome
 from cashflow.schedule import (
-    Daily, DateDistribution, DayOfMonthDistribution, DayOfWeekDistribution, Monthly, Never, Once,
+    Daily, DateDistribution, DayOfMonthDistribution, DayOfWeekDistribution, EventSchedule, Monthly, Never, Once,
     SimpleDayOfMonthSchedule, SimpleDayOfWeekSchedule, Weekdays, Weekends, Weekly)
 
 from .helpers import approx_floats
 
 
+def test_event_schedule_iterate_cached() -> None:
+    s = Weekly(2, range=DateRange.beginning_at(date(2023, 1, 2)), period=2)
+    date_range = DateRange.inclusive(date(2023, 1, 1), date(2023, 3, 1))
+    events = s.iterate_cached(date_range)
+    assert events == tuple(s.iterate(date_range))
+    assert s.iterate_cached(date_range) is events
+    other_range = DateRange.inclusive(date(2023, 2, 1), date(2023, 3, 1))
+    assert s.iterate_cached(other_range) == tuple(s.iterate(other_range))
+
+def test_event_schedule_iterate_cached_unhashable() -> None:
+    @dataclass
+    class Custom(EventSchedule):
+        day: date
+
+        def iterate(self, date_range: DateRange, /) -> Iterable[DateDistribution]:
+            return (DateDistribution.singular(self.day),) if self.day in date_range else ()
+
+    s = Custom(date(2023, 1, 5))
+    date_range = DateRange.inclusive(date(2023, 1, 1), date(2023, 3, 1))
+    assert s.iterate_cached(date_range) == (DateDistribution.singular(date(2023, 1, 5)),)
+
+
 def test_never_iterate_empty_range() -> None:
     events = tuple(Never().iterate(DateRange.empty()))
     assert events == ()
@@ -92,6 +116,28 @@ def test_daily_iterate_excludes() -> None:
     )
     assert events == expected
 
+def test_daily_exclude_captured() -> None:
+    exclude = [date(2027, 1, 2)]
+    s = Daily(range=DateRange.inclusive(date(2027, 1, 1), date(2027, 1, 3)), exclude=exclude)
+    exclude.append(date(2027, 1, 3))
+    assert s.exclude == (date(2027, 1, 2),)
+    events = tuple(s.iterate(DateRange.all()))
+    assert events == (DateDistribution.singular(date(2027, 1, 1)), DateDistribution.singular(date(2027, 1, 3)))
+
+def test_daily_iterate_excludes_overlapping_ranges() -> None:
+    s = Daily(exclude=(DateRange.inclusive(date(2027, 1, 2), date(2027, 1, 10)), date(2027, 1, 13),
+        DateRange.inclusive(date(2027, 1, 4), date(2027, 1, 5)),
+        DateRange.inclusive(date(2027, 1, 8), date(2027, 1, 11))))
+    events = tuple(s.iterate(DateRange.inclusive(date(2027, 1, 1), date(2027, 1, 14))))
+    expected = (
+        DateDistribution.singular(date(2027, 1, 1)),
+        # 2027/1/2 to 2027/1/11 excluded
+        DateDistribution.singular(date(2027, 1, 12)),
+        # 2027/1/13 excluded
+        DateDistribution.singular(date(2027, 1, 14))
+    )
+    assert events == expected
+
 
 def test_weekdays_iterate_no_excludes() -> None:
     s = Weekdays(DateRange.inclusive(date(2022, 4, 3), date(2022, 8, 2)))